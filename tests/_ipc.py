@@ -0,0 +1,348 @@
+"""
+Shared native-messaging IPC helpers for the Rust helper integration tests.
+
+Frames are a native-endian u32 length prefix followed by a JSON payload, the
+same format Thunderbird uses. msgspec or orjson encode/decode the payload when
+installed; otherwise stdlib json is used.
+
+The payload has to stay JSON: native_messaging.rs parses requests with
+serde_json only, and Thunderbird itself only speaks JSON to the host, so a
+binary encoding such as MessagePack would never be exercised in production.
+"""
+
+import json
+import os
+import selectors
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+try:
+    import msgspec
+except ImportError:  # optional; fall back to orjson, then stdlib json
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if sys.platform == "win32":
+    # select() only accepts sockets on Windows, so pipe readiness is polled
+    # with PeekNamedPipe instead of a selector.
+    import ctypes
+    import msvcrt
+    from ctypes import wintypes
+
+    _PeekNamedPipe = ctypes.windll.kernel32.PeekNamedPipe
+    _PeekNamedPipe.argtypes = [
+        wintypes.HANDLE, ctypes.c_void_p, wintypes.DWORD,
+        ctypes.c_void_p, ctypes.POINTER(wintypes.DWORD), ctypes.c_void_p,
+    ]
+    _PeekNamedPipe.restype = wintypes.BOOL
+
+# The Rust helper speaks JSON on the wire, so only the Python-side codec changes.
+if msgspec is not None:
+    _ENC = msgspec.json.Encoder()
+    _DEC = msgspec.json.Decoder()
+    _encode = _ENC.encode
+    _decode = _DEC.decode
+elif orjson is not None:
+    _encode = orjson.dumps
+    _decode = orjson.loads
+else:
+    def _encode(message):
+        return json.dumps(message, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+    def _decode(message_bytes):
+        # json.loads detects UTF-8 in bytes input but does not accept memoryview
+        return json.loads(bytes(message_bytes))
+
+
+# Pipes are opened unbuffered (raw FileIO): writes are framed into one buffer
+# and FrameReader does its own buffering, so a BufferedWriter/BufferedReader
+# would only add a copy. pipesize (Python 3.10+) grows the kernel pipe on
+# Linux and is ignored elsewhere.
+_POPEN_KWARGS = {"bufsize": 0}
+if sys.version_info >= (3, 10):
+    _POPEN_KWARGS["pipesize"] = 1 << 20
+
+# Profile/work dirs are removed like shutil.rmtree(..., ignore_errors=True): a
+# helper that was just killed may still hold its binary or DB files (Windows).
+_TMPDIR_KWARGS = {}
+if sys.version_info >= (3, 10):
+    _TMPDIR_KWARGS["ignore_cleanup_errors"] = True
+
+# Poll interval for pipe readiness where select() cannot wait on pipes
+_PIPE_POLL_SECONDS = 0.005
+
+# Native messaging length prefix (native-endian u32), compiled once
+_LEN = struct.Struct("=I")
+
+
+def _write_all(proc, data):
+    """Write straight to the stdin fd; there is no userspace buffer to flush."""
+    view = memoryview(data)
+    while view:
+        view = view[os.write(proc._stdin_fd, view):]
+
+
+def send_message(proc, message):
+    encoded = _encode(message)
+    # Length prefix + payload in a single write
+    _write_all(proc, _LEN.pack(len(encoded)) + encoded)
+
+
+def send_many(proc, messages):
+    """Frame several messages into one buffer and write it with a single call."""
+    buf = bytearray()
+    for message in messages:
+        encoded = _encode(message)
+        buf += _LEN.pack(len(encoded))
+        buf += encoded
+    _write_all(proc, buf)
+
+
+class FrameReader:
+    """Unframes length-prefixed messages from a pipe through one reusable buffer.
+
+    Reads go to the raw pipe (unwrapping a buffered stream if one is passed): a
+    buffered read-ahead would hold responses the caller's selector cannot see.
+    """
+
+    def __init__(self, stream, size=65536):
+        self._stream = getattr(stream, "raw", stream)
+        self._buf = bytearray(size)
+        self._start = 0  # first unconsumed byte
+        self._end = 0  # one past the last valid byte
+
+    def _frame_size(self):
+        """Prefix + payload size of the next frame, or None if its prefix is incomplete."""
+        if self._end - self._start < _LEN.size:
+            return None
+        return _LEN.size + _LEN.unpack_from(self._buf, self._start)[0]
+
+    def has_frame(self):
+        """True if a complete frame is already buffered."""
+        size = self._frame_size()
+        return size is not None and self._end - self._start >= size
+
+    def fill(self):
+        """Issue one readinto from the pipe. Returns the byte count (0 on EOF)."""
+        if self._start:
+            # Compact pending bytes to the front before reading more.
+            pending = self._end - self._start
+            self._buf[:pending] = self._buf[self._start:self._end]
+            self._start, self._end = 0, pending
+        needed = max(self._frame_size() or 0, self._end + 1)
+        if needed > len(self._buf):
+            self._buf.extend(bytes(needed - len(self._buf)))
+        with memoryview(self._buf) as view:
+            n = self._stream.readinto(view[self._end:]) or 0
+        self._end += n
+        return n
+
+    def read_frame(self):
+        """Return the next decoded message, or None on EOF."""
+        while not self.has_frame():
+            if not self.fill():
+                return None
+        size = self._frame_size()
+        with memoryview(self._buf) as view:
+            message = _decode(view[self._start + _LEN.size:self._start + size])
+        self._start += size
+        if self._start == self._end:
+            self._start = self._end = 0
+        return message
+
+
+def _pipe_has_data(proc):
+    """Windows: True if stdout has bytes to read, or is broken so the read sees EOF."""
+    available = wintypes.DWORD()
+    handle = msvcrt.get_osfhandle(proc.stdout.fileno())
+    if not _PeekNamedPipe(handle, None, 0, None, ctypes.byref(available), None):
+        return True
+    return available.value > 0
+
+
+def _wait_readable(proc, timeout):
+    """Wait up to timeout seconds for stdout to become readable. Returns False on timeout."""
+    if proc._sel is not None:
+        return bool(proc._sel.select(timeout))
+    deadline = time.monotonic() + timeout
+    while not _pipe_has_data(proc):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        time.sleep(min(_PIPE_POLL_SECONDS, remaining))
+    return True
+
+
+def read_message(proc, timeout_seconds=None):
+    """Read one response. Returns None on EOF; raises TimeoutError if none arrives in time.
+
+    timeout_seconds=None blocks until a response or EOF. Timeouts work on every
+    platform: a selector waits on POSIX, PeekNamedPipe is polled on Windows.
+    """
+    frames = proc._frames
+    deadline = None if timeout_seconds is None else time.monotonic() + timeout_seconds
+    while not frames.has_frame():
+        # Only wait for readiness when nothing complete is buffered yet
+        if deadline is not None and not _wait_readable(proc, max(deadline - time.monotonic(), 0)):
+            raise TimeoutError(f"No response within {timeout_seconds}s")
+        if not frames.fill():
+            return None
+    return frames.read_frame()
+
+
+def read_all_responses(proc, expected_count, timeout_seconds=60):
+    """Read multiple responses (possibly out of order). Returns dict keyed by id."""
+    responses = {}
+    deadline = time.monotonic() + timeout_seconds
+    while len(responses) < expected_count:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError(
+                f"Only got {len(responses)}/{expected_count} responses within {timeout_seconds}s. "
+                f"Got ids: {list(responses.keys())}"
+            )
+        resp = read_message(proc, timeout_seconds=remaining)
+        if resp is None:
+            raise EOFError("Process closed stdout (EOF)")
+        resp_id = resp.get("id")
+        if resp_id:
+            responses[resp_id] = resp
+    return responses
+
+
+def drain(proc, quiet_seconds=0.05):
+    """Discard responses until none arrives for quiet_seconds. Returns how many were dropped.
+
+    Reader- and writer-thread replies are not ordered against each other, so a
+    late reply from an earlier request can show up after later ones; draining
+    until the pipe goes quiet is the only way to know it is empty.
+    """
+    dropped = 0
+    while True:
+        try:
+            if read_message(proc, quiet_seconds) is None:
+                return dropped
+        except TimeoutError:
+            return dropped
+        dropped += 1
+
+
+def reset(proc, timeout_seconds=30):
+    """Clear both databases on a shared helper so the next test starts empty.
+
+    Replies an earlier failed test left unread are drained first, and any that
+    still arrive before a reset reply are skipped by id.
+    """
+    drain(proc)
+    for req_id, method in (("reset-clear", "clear"), ("reset-memoryClear", "memoryClear")):
+        send_message(proc, {"id": req_id, "method": method, "params": {}})
+        resp = read_message(proc, timeout_seconds)
+        while resp is not None and resp.get("id") != req_id:
+            resp = read_message(proc, timeout_seconds)
+        if resp is None:
+            raise EOFError(f"Helper closed stdout during {method}")
+        if "result" not in resp:
+            raise AssertionError(f"{method} failed: {resp}")
+
+
+def temporary_directory(prefix):
+    """tempfile.TemporaryDirectory whose cleanup() does not raise where supported."""
+    return tempfile.TemporaryDirectory(prefix=prefix, **_TMPDIR_KWARGS)
+
+
+def resolve_helper_path():
+    """Resolved TABMAIL_RUST_FTS_HELPER path; raises unittest.SkipTest if unset or missing."""
+    rust_helper_path = os.environ.get("TABMAIL_RUST_FTS_HELPER")
+    if not rust_helper_path:
+        raise unittest.SkipTest("TABMAIL_RUST_FTS_HELPER not set (build Rust binary and set env var)")
+    resolved = str(Path(rust_helper_path).resolve())
+    if not Path(resolved).exists():
+        raise unittest.SkipTest(f"Rust helper not found: {resolved}")
+    return resolved
+
+
+def handshake(proc, profile_path, addon_version, ids=("1", "2"), timeout_seconds=30):
+    """Send hello + init in one write and return (hello_resp, init_resp).
+
+    Pre-init requests are handled one at a time on the host's main thread, so
+    the responses come back in order. Raises EOFError if the helper exits.
+    """
+    hello_id, init_id = ids
+    send_many(proc, [
+        {"id": hello_id, "method": "hello", "params": {"addonVersion": addon_version}},
+        {"id": init_id, "method": "init", "params": {"profilePath": profile_path}},
+    ])
+    responses = []
+    for _ in ids:
+        resp = read_message(proc, timeout_seconds)
+        if resp is None:
+            raise EOFError("Process closed stdout (EOF)")
+        responses.append(resp)
+    return tuple(responses)
+
+
+def shared_helper(path, profile_dir, addon_version, ids=("1", "2")):
+    """Start a helper for a whole test class and run hello + init on profile_dir.
+
+    Returns (proc, hello_resp, init_resp). The helper is stopped again if the
+    handshake raises, so a failing setUpClass leaks no process or pipes.
+    """
+    proc = start_helper(path)
+    try:
+        hello_resp, init_resp = handshake(proc, profile_dir, addon_version, ids)
+    except BaseException:
+        stop_helper(proc)
+        raise
+    return proc, hello_resp, init_resp
+
+
+def start_helper(path, stderr=subprocess.DEVNULL):
+    """Spawn the helper with unbuffered, sized pipes, a cached stdin fd, a selector and a FrameReader.
+
+    The selector is POSIX-only (proc._sel is None on Windows, see _wait_readable).
+
+    stderr defaults to DEVNULL: nothing reads it, and a PIPE could fill with
+    helper warnings and block it.
+    """
+    proc = subprocess.Popen(
+        [str(path)],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=stderr,
+        **_POPEN_KWARGS,
+    )
+    proc._stdin_fd = proc.stdin.fileno()
+    proc._sel = None
+    if sys.platform != "win32":
+        proc._sel = selectors.DefaultSelector()
+        proc._sel.register(proc.stdout, selectors.EVENT_READ)
+    proc._frames = FrameReader(proc.stdout)
+    return proc
+
+
+def stop_helper(proc):
+    """Close the pipes and wait briefly for the helper to exit, killing it if needed."""
+    if proc._sel is not None:
+        proc._sel.close()
+    # Close both pipes so a helper mid-write sees EPIPE instead of hanging.
+    for stream in (proc.stdin, proc.stdout):
+        try:
+            stream.close()
+        except Exception:
+            pass
+    # Cap teardown at a short, known budget.
+    deadline = time.monotonic() + 2
+    while proc.poll() is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    if proc.poll() is None:
+        proc.kill()
+        proc.wait(timeout=1)
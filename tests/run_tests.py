@@ -8,13 +8,20 @@ Usage:
     python tests/run_tests.py update    # Run update mechanism tests
     python tests/run_tests.py mt        # Run multi-threaded dispatch tests
     python tests/run_tests.py -v        # Verbose output
+    python tests/run_tests.py -w 4      # Run in 4 parallel workers (pytest-xdist)
+    python tests/run_tests.py --pypy    # Re-run the harness under pypy3 if installed
 
 Requires:
     - Built Rust binary: cargo build --release
     - Set TABMAIL_RUST_FTS_HELPER env var to binary path (optional, auto-detected)
+    - For --workers: pip install pytest pytest-xdist
 """
 
 import argparse
+import importlib.util
+import os
+import platform
+import shutil
 import sys
 import unittest
 from pathlib import Path
@@ -23,33 +30,51 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 
-def run_tests(test_type=None, verbosity=2):
-    """Run tests based on type."""
-    loader = unittest.TestLoader()
-    suite = unittest.TestSuite()
+# Discovery pattern for each test type
+TEST_PATTERNS = {
+    'all': 'test_*.py',
+    'rust': 'test_rust_process_parity.py',
+    'update': 'test_rust_update_request.py',
+    'mt': 'test_multithreaded.py',
+}
 
-    tests_dir = Path(__file__).parent
 
-    if test_type is None or test_type == 'all':
-        # Run all tests
-        suite.addTests(loader.discover(str(tests_dir), pattern='test_*.py'))
-    elif test_type == 'rust':
-        # Run Rust process parity tests
-        from tests import test_rust_process_parity
-        suite.addTests(loader.loadTestsFromModule(test_rust_process_parity))
-    elif test_type == 'update':
-        # Run update mechanism tests
-        from tests import test_rust_update_request
-        suite.addTests(loader.loadTestsFromModule(test_rust_update_request))
-    elif test_type == 'mt':
-        # Run multi-threaded dispatch tests
-        from tests import test_multithreaded
-        suite.addTests(loader.loadTestsFromModule(test_multithreaded))
+def run_tests_parallel(pattern, workers, verbosity=2):
+    """Run tests under pytest-xdist. Returns None if pytest-xdist is unavailable."""
+    if importlib.util.find_spec('xdist') is None:
+        print("pytest-xdist not installed (pip install pytest pytest-xdist); running serially")
+        return None
+    import pytest
+
+    tests_dir = Path(__file__).parent
+    target = tests_dir if pattern == TEST_PATTERNS['all'] else tests_dir / pattern
+    # Each test class shares one helper process, so keep a class on one worker.
+    args = ['-n', str(workers), '--dist', 'loadscope', str(target)]
+    if verbosity >= 3:
+        args.append('-vv')
+    elif verbosity == 2:
+        args.append('-v')
     else:
+        args.append('-q')
+    return pytest.main(args)
+
+
+def run_tests(test_type=None, verbosity=2, workers=1):
+    """Run tests based on type."""
+    pattern = TEST_PATTERNS.get(test_type or 'all')
+    if pattern is None:
         print(f"Unknown test type: {test_type}")
-        print("Valid types: all, rust, update, mt")
+        print(f"Valid types: {', '.join(TEST_PATTERNS)}")
         sys.exit(1)
 
+    if workers > 1:
+        exit_code = run_tests_parallel(pattern, workers, verbosity)
+        if exit_code is not None:
+            return int(exit_code)
+
+    tests_dir = Path(__file__).parent
+    suite = unittest.defaultTestLoader.discover(str(tests_dir), pattern=pattern)
+
     runner = unittest.TextTestRunner(verbosity=verbosity)
     result = runner.run(suite)
 
@@ -63,7 +88,7 @@ def main():
         'type',
         nargs='?',
         default='all',
-        choices=['all', 'rust', 'update', 'mt'],
+        choices=list(TEST_PATTERNS),
         help='Type of tests to run (default: all)'
     )
     parser.add_argument(
@@ -77,15 +102,35 @@ def main():
         help='Minimal output'
     )
 
+    parser.add_argument(
+        '-w', '--workers',
+        type=int,
+        default=1,
+        help='Run tests in N parallel workers via pytest-xdist (default: 1, serial)'
+    )
+
+    parser.add_argument(
+        '--pypy',
+        action='store_true',
+        help='Re-exec the test harness under pypy3 when available'
+    )
+
     args = parser.parse_args()
 
+    if args.pypy and platform.python_implementation() != 'PyPy':
+        pypy = shutil.which('pypy3')
+        if pypy:
+            # Under PyPy --pypy is a no-op, so argv can be passed through unchanged.
+            os.execv(pypy, [pypy, __file__, *sys.argv[1:]])
+        print("pypy3 not found on PATH; running under CPython")
+
     verbosity = 2
     if args.verbose:
         verbosity = 3
     elif args.quiet:
         verbosity = 1
 
-    sys.exit(run_tests(args.type, verbosity))
+    sys.exit(run_tests(args.type, verbosity, args.workers))
 
 
 if __name__ == '__main__':
@@ -8,16 +8,16 @@ This validates:
 - Ed25519 signature verification works
 - The host exits after a successful update so Thunderbird can reconnect (TB-as-brain model)
 
-This uses a local HTTP server and signs the update metadata using OpenSSL + the local
-private key PEM referenced by TM_UPDATE_PRIVATE_KEY_PEM_PATH in tabmail-native-fts/.dev.vars.
+This uses a local HTTP server and signs the update metadata with the local private key
+PEM referenced by TM_UPDATE_PRIVATE_KEY_PEM_PATH in tabmail-native-fts/.dev.vars, in-process
+via the `cryptography` package when installed, otherwise via the OpenSSL CLI.
 """
 
 import base64
+import functools
 import hashlib
-import json
 import os
 import shutil
-import struct
 import subprocess
 import sys
 import tempfile
@@ -27,21 +27,23 @@ import unittest
 from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 
+try:
+    from cryptography.hazmat.primitives import serialization
+except ImportError:  # optional; fall back to the openssl CLI
+    serialization = None
 
-def _send_message(proc, message):
-    encoded = json.dumps(message).encode("utf-8")
-    proc.stdin.write(struct.pack("=I", len(encoded)))
-    proc.stdin.write(encoded)
-    proc.stdin.flush()
+if not __package__:
+    # Allow running this file directly (python3 tests/test_rust_update_request.py)
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-
-def _read_message(proc):
-    raw_length = proc.stdout.read(4)
-    if not raw_length:
-        return None
-    message_length = struct.unpack("=I", raw_length)[0]
-    message_bytes = proc.stdout.read(message_length)
-    return json.loads(message_bytes.decode("utf-8"))
+from tests._ipc import (
+    read_message as _read_message,
+    resolve_helper_path,
+    send_message as _send_message,
+    start_helper,
+    stop_helper,
+    temporary_directory,
+)
 
 
 def _platform_key_macos():
@@ -54,6 +56,45 @@ def _platform_key_macos():
     return "macos-x86_64"
 
 
+def _sha256_file(path) -> str:
+    """Hex SHA-256 of a file, streamed instead of read into memory."""
+    with open(path, "rb") as f:
+        if hasattr(hashlib, "file_digest"):  # Python 3.11+, C-level read loop
+            return hashlib.file_digest(f, "sha256").hexdigest()
+        digest = hashlib.sha256()
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+        return digest.hexdigest()
+
+
+# Digests keyed by file identity rather than path: each test serves a fresh
+# path, but it is a hardlink of the same inode, so one hash covers the run.
+_SHA256_CACHE = {}
+
+
+def _sha256_cached(path) -> str:
+    """_sha256_file, memoized on (device, inode, size, mtime_ns)."""
+    st = os.stat(path)
+    key = (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+    digest = _SHA256_CACHE.get(key)
+    if digest is None:
+        digest = _SHA256_CACHE[key] = _sha256_file(path)
+    return digest
+
+
+def _link_or_copy(src, dst) -> bool:
+    """Hardlink src to dst (no bytes copied), falling back to a copy across filesystems.
+
+    Returns True if dst is a copy, i.e. a separate inode that is safe to chmod.
+    """
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+        return True
+    return False
+
+
 def _signed_message(version: str, platform_key: str, sha256_hex: str, url: str) -> str:
     return f"tabmail-native-fts|host_version={version}|platform={platform_key}|sha256={sha256_hex}|url={url}"
 
@@ -83,31 +124,40 @@ def _sign_ed25519_base64(private_key_pem: str, message: str) -> str:
 
 
 class TestRustUpdateRequest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # Resolve and validate the helper/key paths once per class, not per test.
+        cls.rust_helper_path = resolve_helper_path()
+
+        cls.private_key_pem = os.environ.get("TM_UPDATE_PRIVATE_KEY_PEM_PATH")
+        if not cls.private_key_pem or not Path(cls.private_key_pem).exists():
+            raise unittest.SkipTest("TM_UPDATE_PRIVATE_KEY_PEM_PATH not set or missing (needed to sign update metadata)")
+
+        # Load the key once and sign in-process when cryptography is installed.
+        cls._signing_key = None
+        if serialization is not None:
+            cls._signing_key = serialization.load_pem_private_key(
+                Path(cls.private_key_pem).read_bytes(), password=None
+            )
+
     def setUp(self):
-        self.rust_helper_path = os.environ.get("TABMAIL_RUST_FTS_HELPER")
-        if not self.rust_helper_path:
-            self.skipTest("TABMAIL_RUST_FTS_HELPER not set (build Rust binary and set env var)")
-        self.rust_helper_path = str(Path(self.rust_helper_path).resolve())
-        if not Path(self.rust_helper_path).exists():
-            self.skipTest(f"Rust helper not found: {self.rust_helper_path}")
-
-        self.private_key_pem = os.environ.get("TM_UPDATE_PRIVATE_KEY_PEM_PATH")
-        if not self.private_key_pem or not Path(self.private_key_pem).exists():
-            self.skipTest("TM_UPDATE_PRIVATE_KEY_PEM_PATH not set or missing (needed to sign update metadata)")
-
-        self.work_dir = tempfile.mkdtemp(prefix="tm_update_req_")
+        self._tmp = temporary_directory(prefix="tm_update_req_")
+        self.work_dir = self._tmp.name
         self.bin_dir = Path(self.work_dir) / "bin"
         self.bin_dir.mkdir(parents=True, exist_ok=True)
 
-        # Copy helper into a writable location so it can self-update (overwrite itself).
+        # Link helper into a writable location so it can self-update (overwrite itself).
+        # A hardlink is safe: the update renames the staged file over the path
+        # rather than writing into the shared inode. Only chmod copies: a link
+        # shares its mode with the caller's own build output.
         self.local_helper = self.bin_dir / "fts_helper"
-        shutil.copy2(self.rust_helper_path, self.local_helper)
-        os.chmod(self.local_helper, 0o755)
+        if _link_or_copy(self.rust_helper_path, self.local_helper):
+            os.chmod(self.local_helper, 0o755)
 
         # We'll serve the "new" binary as the same file bytes for this test.
         self.download_file = self.bin_dir / "fts_helper-download"
-        shutil.copy2(self.local_helper, self.download_file)
-        os.chmod(self.download_file, 0o755)
+        if _link_or_copy(self.local_helper, self.download_file):
+            os.chmod(self.download_file, 0o755)
 
         self.httpd = None
         self.http_thread = None
@@ -118,18 +168,30 @@ class TestRustUpdateRequest(unittest.TestCase):
             self.httpd.shutdown()
         if self.http_thread:
             self.http_thread.join(timeout=2)
-        shutil.rmtree(self.work_dir, ignore_errors=True)
+        self._tmp.cleanup()
 
-    def _start_server(self):
-        # Serve files from bin_dir
-        os.chdir(self.bin_dir)
+    def _sign(self, version, platform_key, sha256_hex, url):
+        """Base64 Ed25519 signature of the update metadata."""
+        msg = _signed_message(version, platform_key, sha256_hex, url)
+        if self._signing_key is not None:
+            return base64.b64encode(self._signing_key.sign(msg.encode("utf-8"))).decode("utf-8")
+        return _sign_ed25519_base64(self.private_key_pem, msg)
 
+    def _start_server(self):
         class Handler(SimpleHTTPRequestHandler):
             def log_message(self, format, *args):
                 # Keep test output quiet
                 return
 
-        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+            def copyfile(self, source, outputfile):
+                # Zero-copy from the page cache to the socket (os.sendfile where
+                # supported; socket.sendfile falls back to a send loop elsewhere)
+                outputfile.flush()
+                self.connection.sendfile(source)
+
+        # Serve files from bin_dir without touching the process-wide CWD
+        handler = functools.partial(Handler, directory=str(self.bin_dir))
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
         host, port = self.httpd.server_address
         self.base_url = f"http://{host}:{port}"
         self.http_thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
@@ -139,20 +201,14 @@ class TestRustUpdateRequest(unittest.TestCase):
         self._start_server()
 
         url = f"{self.base_url}/{self.download_file.name}"
-        sha256_hex = hashlib.sha256(self.download_file.read_bytes()).hexdigest()
+        sha256_hex = _sha256_cached(self.download_file)
         platform_key = _platform_key_macos()
 
         # targetVersion higher than current; binary bytes can be identical for this integration test.
         target_version = "0.6.999"
-        msg = _signed_message(target_version, platform_key, sha256_hex, url)
-        sig_b64 = _sign_ed25519_base64(self.private_key_pem, msg)
+        sig_b64 = self._sign(target_version, platform_key, sha256_hex, url)
 
-        proc = subprocess.Popen(
-            [str(self.local_helper)],
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-        )
+        proc = start_helper(self.local_helper)
 
         try:
             _send_message(proc, {"id": "1", "method": "hello", "params": {"addonVersion": "test"}})
@@ -185,10 +241,7 @@ class TestRustUpdateRequest(unittest.TestCase):
             self.assertEqual(proc.returncode, 0)
 
         finally:
-            try:
-                proc.kill()
-            except Exception:
-                pass
+            stop_helper(proc)
 
     def test_signature_rejects_wrong_platform_key(self):
         """
@@ -198,21 +251,15 @@ class TestRustUpdateRequest(unittest.TestCase):
         self._start_server()
 
         url = f"{self.base_url}/{self.download_file.name}"
-        sha256_hex = hashlib.sha256(self.download_file.read_bytes()).hexdigest()
+        sha256_hex = _sha256_cached(self.download_file)
         platform_key = _platform_key_macos()
 
         # Sign for a DIFFERENT platform than what we send to updateRequest.
         signed_for_platform = "windows-x86_64"
         target_version = "0.6.999"
-        msg = _signed_message(target_version, signed_for_platform, sha256_hex, url)
-        sig_b64 = _sign_ed25519_base64(self.private_key_pem, msg)
+        sig_b64 = self._sign(target_version, signed_for_platform, sha256_hex, url)
 
-        proc = subprocess.Popen(
-            [str(self.local_helper)],
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-        )
+        proc = start_helper(self.local_helper)
 
         try:
             _send_message(proc, {"id": "1", "method": "hello", "params": {"addonVersion": "test"}})
@@ -239,9 +286,6 @@ class TestRustUpdateRequest(unittest.TestCase):
             self.assertIsNotNone(resp)
             self.assertIn("error", resp)
         finally:
-            try:
-                proc.kill()
-            except Exception:
-                pass
+            stop_helper(proc)
 
 